@@ -1,68 +1,130 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional
-import psycopg
-from psycopg.rows import dict_row
-from psycopg.types.json import Json
+from datetime import datetime
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.coder import JsonCoder, object_hook
+from fastapi_cache.decorator import cache
+from redis import asyncio as aioredis
+import asyncpg
+import json
+import orjson
 import os
-import time
+from uuid import uuid4
 from contextlib import asynccontextmanager
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+DATABASE_SSL = os.getenv('DATABASE_SSL', 'require')
+# Set when DATABASE_URL points at a PgBouncer in transaction pooling mode
+USE_PGBOUNCER = os.getenv('PGBOUNCER') == '1'
+# Comma separated list of front-end origins allowed to call the API
+ALLOWED_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
+    if origin.strip()
+]
 # --------------------------
-# Database connection
+# Database connection pool
 # --------------------------
-def get_db_connection():
-    database_url = os.getenv('DATABASE_URL')
-    if not database_url:
+def encode_jsonb(value):
+    # JSONB binary format is a version byte followed by the JSON text
+    return b'\x01' + orjson.dumps(value)
+
+def decode_jsonb(data):
+    return orjson.loads(data[1:])
+
+async def init_connection(conn: asyncpg.Connection):
+    # Let dicts/lists go straight into JSONB columns and come back decoded.
+    # The codec has to be binary so COPY (bulk create) can use it too.
+    await conn.set_type_codec(
+        'jsonb', encoder=encode_jsonb, decoder=decode_jsonb,
+        schema='pg_catalog', format='binary'
+    )
+
+async def create_pool():
+    if not DATABASE_URL:
         raise Exception("DATABASE_URL environment variable is not set")
 
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            conn = psycopg.connect(database_url, sslmode='require')
-            return conn
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"Connection attempt {attempt + 1} failed: {e}. Retrying...")
-                time.sleep(5)
-            else:
-                raise e
+    server_settings = {'application_name': 'entries-api'}
+    if not USE_PGBOUNCER:
+        # PgBouncer refuses startup parameters it does not track
+        server_settings['jit'] = 'off'
+
+    return await asyncpg.create_pool(
+        DATABASE_URL,
+        min_size=5,
+        max_size=20,
+        ssl=DATABASE_SSL,
+        init=init_connection,
+        # Prepared statements don't survive PgBouncer handing the
+        # transaction to a different backend
+        statement_cache_size=0 if USE_PGBOUNCER else 100,
+        server_settings=server_settings,
+    )
+
+async def get_conn(request: Request):
+    async with request.app.state.pool.acquire() as conn:
+        yield conn
 
 # --------------------------
 # Table creation
 # --------------------------
-def create_tables():
+async def create_tables(pool: asyncpg.Pool):
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS entries (
-            id SERIAL PRIMARY KEY,
-            title VARCHAR(200) NOT NULL,
-            description TEXT,
-            profile_image TEXT,
-            location TEXT,
-            mobiles JSONB,
-            reaching_video TEXT,
-            social JSONB,
-            type JSONB,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-
-        conn.commit()
-        cur.close()
-        conn.close()
+        async with pool.acquire() as conn:
+            await conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id SERIAL PRIMARY KEY,
+                title VARCHAR(200) NOT NULL,
+                description TEXT,
+                profile_image TEXT,
+                location TEXT,
+                mobiles JSONB,
+                reaching_video TEXT,
+                social JSONB,
+                type JSONB,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+
         print("✅ Database table 'entries' is ready")
     except Exception as e:
         print(f"❌ Error creating tables: {e}")
 
+# --------------------------
+# Response cache
+# --------------------------
+def cache_object_hook(obj):
+    # JsonCoder revives datetimes through pendulum as UTC-aware; keep them naive like asyncpg
+    if obj.get("_spec_type") == "datetime":
+        return datetime.fromisoformat(obj["val"])
+    return object_hook(obj)
+
+class CacheCoder(JsonCoder):
+    @classmethod
+    def decode(cls, value: bytes):
+        return json.loads(value.decode(), object_hook=cache_object_hook)
+
+def init_cache(app: FastAPI):
+    redis_url = os.getenv('REDIS_URL')
+    if redis_url:
+        app.state.redis = aioredis.from_url(redis_url)
+        FastAPICache.init(RedisBackend(app.state.redis), prefix="yello", coder=CacheCoder)
+    else:
+        # A per-process cache can't be invalidated across workers
+        logger.warning("REDIS_URL is not set, response caching is disabled")
+        app.state.redis = None
+        FastAPICache.init(InMemoryBackend(), prefix="yello", enable=False)
+
 # --------------------------
 # Pydantic models
 # --------------------------
@@ -82,10 +144,10 @@ class EntryBase(BaseModel):
     description: Optional[str] = None
     profile_image: Optional[str] = None
     location: Optional[str] = None
-    mobiles: Optional[List[str]] = []  # Accept list of strings
+    mobiles: Optional[List[str]] = Field(default_factory=list)  # Accept list of strings
     reaching_video: Optional[str] = None
-    social: Optional[SocialModel] = SocialModel()
-    type: Optional[TypeModel] = TypeModel()
+    social: Optional[SocialModel] = Field(default_factory=SocialModel)
+    type: Optional[TypeModel] = Field(default_factory=TypeModel)
 
 class EntryCreate(EntryBase):
     pass
@@ -102,8 +164,20 @@ class EntryUpdate(BaseModel):
 
 class EntryResponse(EntryBase):
     id: int
-    created_at: str
-    updated_at: str
+    created_at: datetime
+    updated_at: datetime
+
+class EntryListItem(BaseModel):
+    id: int
+    title: str
+    profile_image: Optional[str] = None
+    location: Optional[str] = None
+    type: Optional[TypeModel] = None
+    created_at: datetime
+
+class EntryListPage(BaseModel):
+    items: List[EntryListItem]
+    next_cursor: Optional[int] = None
 
 # --------------------------
 # Lifespan context manager
@@ -111,9 +185,14 @@ class EntryResponse(EntryBase):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 Starting FastAPI application...")
-    create_tables()
+    app.state.pool = await create_pool()
+    # Schema setup is a deploy step; run it from a single process only
+    if os.getenv("RUN_MIGRATIONS") == "1":
+        await create_tables(app.state.pool)
+    init_cache(app)
     yield
     print("👋 Shutting down FastAPI application...")
+    await app.state.pool.close()
 
 # --------------------------
 # FastAPI app
@@ -121,164 +200,239 @@ async def lifespan(app: FastAPI):
 app = FastAPI(
     title="Entries API",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["content-type", "authorization", "if-none-match"],
+    expose_headers=["etag"],
 )
 
 @app.get("/")
 async def root():
     return {"message": "Entries API is running"}
 
+# --------------------------
+# Inserts
+# --------------------------
+MAX_BULK_ENTRIES = 1000
+
+ENTRY_COLUMNS = [
+    "title", "description", "profile_image", "location",
+    "mobiles", "reaching_video", "social", "type",
+]
+
+# Constant SQL text, so asyncpg's per-connection statement cache
+# prepares it once and reuses the plan on every later insert.
+INSERT_ENTRY_SQL = """
+    INSERT INTO entries
+    (title, description, profile_image, location, mobiles, reaching_video, social, type)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+    RETURNING *
+"""
+
+def entry_record(entry: EntryCreate):
+    # One dump gives JSON-ready lists/dicts for the JSONB columns
+    data = entry.model_dump(mode='json')
+    return tuple(data[column] for column in ENTRY_COLUMNS)
+
+# --------------------------
+# Updates
+# --------------------------
+# Partial update from one JSONB payload: absent keys are kept, nulls clear the column
+UPDATE_ENTRY_SQL = """
+    UPDATE entries SET
+        title = COALESCE($1::jsonb->>'title', title),
+        description = CASE WHEN $1::jsonb ? 'description' THEN $1::jsonb->>'description' ELSE description END,
+        profile_image = CASE WHEN $1::jsonb ? 'profile_image' THEN $1::jsonb->>'profile_image' ELSE profile_image END,
+        location = CASE WHEN $1::jsonb ? 'location' THEN $1::jsonb->>'location' ELSE location END,
+        mobiles = CASE WHEN $1::jsonb ? 'mobiles' THEN NULLIF($1::jsonb->'mobiles', 'null') ELSE mobiles END,
+        reaching_video = CASE WHEN $1::jsonb ? 'reaching_video' THEN $1::jsonb->>'reaching_video' ELSE reaching_video END,
+        social = CASE WHEN $1::jsonb ? 'social' THEN NULLIF($1::jsonb->'social', 'null') ELSE social END,
+        type = CASE WHEN $1::jsonb ? 'type' THEN NULLIF($1::jsonb->'type', 'null') ELSE type END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = $2
+    RETURNING *
+"""
+
+# --------------------------
+# Conditional GET
+# --------------------------
+def make_etag(*parts):
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+def version_of(updated_at: datetime):
+    # Microseconds included, so two updates within a second still differ
+    return f"{updated_at:%Y%m%d%H%M%S%f}"
+
+def not_modified(request: Request, response: Response, etag: str):
+    """Return a 304 if the client already has this version, else tag the response."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # "*" matches any current representation (RFC 9110 13.1.2)
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return None
+
+# --------------------------
+# Cached reads
+# --------------------------
+ENTRIES_GENERATION_KEY = "yello:entries:generation"
+
+async def entries_key_builder(func, namespace="", *, request=None, response=None, args, kwargs):
+    # Writes bump the generation, so a read that raced a write caches under a dead key
+    try:
+        generation = int(await app.state.redis.get(ENTRIES_GENERATION_KEY) or 0)
+    except Exception as e:
+        logger.warning("Could not read entries cache generation: %s", e)
+        return f"{namespace}:uncached:{uuid4().hex}"
+    return f"{namespace}:{generation}:{func.__name__}:{args}:{kwargs}"
+
+@cache(expire=60, namespace="entries", key_builder=entries_key_builder)
+async def fetch_entries(cursor: Optional[int], limit: int):
+    # Keyset pagination: seek past the cursor on the primary key index
+    # instead of scanning and discarding OFFSET rows.
+    # Summary columns only; the detail endpoint returns the full row.
+    async with app.state.pool.acquire() as conn:
+        if cursor is None:
+            rows = await conn.fetch("""
+                SELECT id, title, profile_image, location, type, created_at, updated_at
+                FROM entries ORDER BY id DESC LIMIT $1
+            """, limit)
+        else:
+            rows = await conn.fetch("""
+                SELECT id, title, profile_image, location, type, created_at, updated_at
+                FROM entries WHERE id < $1 ORDER BY id DESC LIMIT $2
+            """, cursor, limit)
+
+    entries = [dict(row) for row in rows]
+    # updated_at is only needed for the page ETag, not in the items
+    last_modified = max((entry.pop('updated_at') for entry in entries), default=None)
+    if entries:
+        etag = make_etag(len(entries), entries[0]['id'], entries[-1]['id'], version_of(last_modified))
+    else:
+        etag = make_etag("empty")
+
+    # A short page means there is nothing left to fetch
+    next_cursor = entries[-1]['id'] if len(entries) == limit else None
+    return {"items": entries, "next_cursor": next_cursor, "etag": etag}
+
+@cache(expire=300, namespace="entries", key_builder=entries_key_builder)
+async def fetch_entry(entry_id: int):
+    async with app.state.pool.acquire() as conn:
+        row = await conn.fetchrow("SELECT * FROM entries WHERE id = $1", entry_id)
+
+    if not row:
+        return None
+
+    return dict(row)
+
+async def invalidate_entries():
+    if app.state.redis is None:
+        return
+
+    # The write has already committed, so a cache outage must not fail it
+    try:
+        await app.state.redis.incr(ENTRIES_GENERATION_KEY)
+    except Exception as e:
+        logger.warning("Could not invalidate entries cache: %s", e)
+
 # --------------------------
 # CRUD Endpoints
 # --------------------------
 @app.post("/entries", response_model=EntryResponse)
-async def create_entry(entry: EntryCreate):
-    logger.debug("🚀 POST /entries called")
-    logger.debug(f"Payload received: {entry.dict()}")
+async def create_entry(entry: EntryCreate, conn=Depends(get_conn)):
+    # Only pay for dumping the payload when debug logging is on
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🚀 POST /entries called, payload: %s", entry.model_dump())
 
     try:
-        conn = get_db_connection()
-        logger.debug("✅ Database connection established")
-
-        cur = conn.cursor(row_factory=dict_row)
-        logger.debug("✅ Cursor created")
-
-        # Prepare values
-        values = (
-            entry.title,
-            entry.description,
-            entry.profile_image,
-            entry.location,
-            Json(entry.mobiles),  # list as JSONB
-            entry.reaching_video,
-            Json(entry.social.dict() if entry.social else {}),  # dict as JSONB
-            Json(entry.type.dict() if entry.type else {})       # dict as JSONB
-        )
-        logger.debug("DEBUG: Prepared values for insertion:")
-        for name, val in zip(
-            ["title","description","profile_image","location","mobiles","reaching_video","social","type"],
-            values
-        ):
-            logger.debug(f"{name}={val}")
-
-        cur.execute("""
-            INSERT INTO entries
-            (title, description, profile_image, location, mobiles, reaching_video, social, type)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING *
-        """, values)
-
-        new_entry = cur.fetchone()
-        conn.commit()
-        logger.debug(f"✅ Entry inserted with ID {new_entry['id']}")
-
-        new_entry['created_at'] = new_entry['created_at'].isoformat()
-        new_entry['updated_at'] = new_entry['updated_at'].isoformat()
-
-        return new_entry
+        values = entry_record(entry)
+        row = await conn.fetchrow(INSERT_ENTRY_SQL, *values)
+    except Exception as e:
+        logger.error("❌ Error inserting entry: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    new_entry = dict(row)
+    logger.debug("✅ Entry inserted with ID %s", new_entry['id'])
+    await invalidate_entries()
+
+    return new_entry
 
+# CREATE many
+@app.post("/entries/bulk")
+async def create_entries_bulk(entries: List[EntryCreate], conn=Depends(get_conn)):
+    if not entries:
+        raise HTTPException(status_code=400, detail="No entries to create")
+    if len(entries) > MAX_BULK_ENTRIES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ENTRIES} entries per request")
+
+    # One COPY instead of a round-trip per INSERT
+    records = [entry_record(entry) for entry in entries]
+    try:
+        await conn.copy_records_to_table('entries', records=records, columns=ENTRY_COLUMNS)
     except Exception as e:
-        logger.error(f"❌ Error inserting entry: {e}")
+        logger.error("❌ Error inserting entries: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
-        logger.debug("✅ Database connection closed")
+
+    await invalidate_entries()
+    return {"message": f"{len(records)} entries created successfully"}
 
 # READ all
-@app.get("/entries", response_model=List[EntryResponse])
+@app.get("/entries", response_model=EntryListPage)
 async def get_all_entries(
-    limit: Optional[int] = Query(100, ge=1, le=1000),
-    offset: Optional[int] = Query(0, ge=0)
+    request: Request,
+    response: Response,
+    cursor: Optional[int] = Query(None),
+    limit: int = Query(100, ge=1, le=1000)
 ):
-    conn = get_db_connection()
-    cur = conn.cursor(row_factory=dict_row)
+    page = await fetch_entries(cursor, limit)
 
-    cur.execute("SELECT * FROM entries ORDER BY id DESC LIMIT %s OFFSET %s", (limit, offset))
-    entries = cur.fetchall()
-
-    cur.close()
-    conn.close()
-
-    for entry in entries:
-        entry['created_at'] = entry['created_at'].isoformat()
-        entry['updated_at'] = entry['updated_at'].isoformat()
-    return entries
+    return not_modified(request, response, page['etag']) or page
 
 # READ one
 @app.get("/entries/{entry_id}", response_model=EntryResponse)
-async def get_entry(entry_id: int):
-    conn = get_db_connection()
-    cur = conn.cursor(row_factory=dict_row)
-
-    cur.execute("SELECT * FROM entries WHERE id = %s", (entry_id,))
-    entry = cur.fetchone()
-
-    cur.close()
-    conn.close()
+async def get_entry(entry_id: int, request: Request, response: Response):
+    entry = await fetch_entry(entry_id)
 
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
 
-    entry['created_at'] = entry['created_at'].isoformat()
-    entry['updated_at'] = entry['updated_at'].isoformat()
-    return entry
+    etag = make_etag(entry['id'], version_of(entry['updated_at']))
+    return not_modified(request, response, etag) or entry
 
 # UPDATE
 @app.put("/entries/{entry_id}", response_model=EntryResponse)
-async def update_entry(entry_id: int, new_data: EntryUpdate):
-    conn = get_db_connection()
-    cur = conn.cursor(row_factory=dict_row)
-
-    fields = {k: v for k, v in new_data.dict(exclude_unset=True).items()}
+async def update_entry(entry_id: int, new_data: EntryUpdate, conn=Depends(get_conn)):
+    fields = new_data.model_dump(exclude_unset=True, mode='json')
     if not fields:
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    set_clause = ", ".join(f"{k} = %s" for k in fields.keys())
-    values = []
-    for k, v in fields.items():
-        if k in ['social', 'type']:
-            values.append(v.dict() if v else {})
-        else:
-            values.append(v)
-    values.append(entry_id)
-
-    cur.execute(f"UPDATE entries SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = %s RETURNING *", values)
-    updated_entry = cur.fetchone()
-    conn.commit()
-    cur.close()
-    conn.close()
+    row = await conn.fetchrow(UPDATE_ENTRY_SQL, fields, entry_id)
 
-    if not updated_entry:
+    if not row:
         raise HTTPException(status_code=404, detail="Entry not found")
 
-    updated_entry['created_at'] = updated_entry['created_at'].isoformat()
-    updated_entry['updated_at'] = updated_entry['updated_at'].isoformat()
+    updated_entry = dict(row)
+    await invalidate_entries()
+
     return updated_entry
 
 # DELETE
 @app.delete("/entries/{entry_id}")
-async def delete_entry(entry_id: int):
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("DELETE FROM entries WHERE id = %s RETURNING id", (entry_id,))
-    deleted = cur.fetchone()
-    conn.commit()
-    cur.close()
-    conn.close()
+async def delete_entry(entry_id: int, conn=Depends(get_conn)):
+    deleted = await conn.fetchval("DELETE FROM entries WHERE id = $1 RETURNING id", entry_id)
 
-    if not deleted:
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Entry not found")
 
+    await invalidate_entries()
     return {"message": "Entry deleted successfully"}